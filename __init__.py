@@ -75,5 +75,16 @@ from .telegram_poster_node import NODE_CLASS_MAPPINGS as TELEGRAM_NODE_CLASS_MAP
 NODE_CLASS_MAPPINGS.update(TELEGRAM_NODE_CLASS_MAPPINGS)
 NODE_DISPLAY_NAME_MAPPINGS.update(TELEGRAM_NODE_DISPLAY_NAME_MAPPINGS)
 
+# --- Import the upload results helper node ---
+from .upload_results import NODE_CLASS_MAPPINGS as RESULTS_NODE_CLASS_MAPPINGS, NODE_DISPLAY_NAME_MAPPINGS as RESULTS_NODE_DISPLAY_NAME_MAPPINGS
+
+# --- Merge the mappings ---
+NODE_CLASS_MAPPINGS.update(RESULTS_NODE_CLASS_MAPPINGS)
+NODE_DISPLAY_NAME_MAPPINGS.update(RESULTS_NODE_DISPLAY_NAME_MAPPINGS)
+
+# --- Start output retention (evicts files recorded before a restart; no-op unless enabled) ---
+from .retention import get_retention_manager
+get_retention_manager()
+
 # --- Export Symbols ---
 __all__ = ['NODE_CLASS_MAPPINGS', 'NODE_DISPLAY_NAME_MAPPINGS']
@@ -9,10 +9,15 @@ import requests
 # Google Drive API libraries
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
+from googleapiclient.http import MediaFileUpload, MediaIoBaseUpload
 from google.auth.transport.requests import Request as GoogleAuthRequest
 import logging
 
+from .image_derivatives import parse_preview_sizes, start_derivatives, collect_derivatives
+from .upload_results import UploadResult, submit_uploads, completed_report
+from .retention import reserved_output_file, track_uploads
+from .large_upload import DRIVE_CHUNK_SIZE, is_large_file, mapped_file, prefetch_window
+
 # --- Configuration ---
 SERVICE_ACCOUNT_FILE = os.path.join(os.path.dirname(__file__), "service_account_key.json")
 PROXY_CONFIG_FILE = os.path.join(os.path.dirname(__file__), "proxy_config.json")
@@ -74,6 +79,48 @@ def create_drive_service(use_proxy=False):
         logger.error(f"❌ Failed to create Drive service: {e}")
         return None
 
+def upload_large_to_drive(service, file_path, file_metadata, mimetype, fields='id', chunk_size=DRIVE_CHUNK_SIZE):
+    """
+    Uploads a large file as a resumable, chunked Drive upload read from a memory map.
+    The next chunk is paged in while the current one is being sent.
+    """
+    with mapped_file(file_path) as mm:
+        media = MediaIoBaseUpload(mm, mimetype=mimetype, chunksize=chunk_size, resumable=True)
+        request = service.files().create(
+            body=file_metadata,
+            media_body=media,
+            fields=fields
+        )
+        response = None
+        offset = 0
+        while response is None:
+            prefetch_window(mm, offset + chunk_size, chunk_size)
+            status, response = request.next_chunk()
+            if status:
+                offset = status.resumable_progress
+                logger.info(f"⏫ {file_metadata.get('name')}: {int(status.progress() * 100)}%")
+        return response
+
+def upload_derivative(service, derivative, filename, gdrive_folder_id=""):
+    """Uploads an in-memory preview next to its full-resolution original."""
+    name = derivative.filename_for(filename)
+    try:
+        file_metadata = {'name': name}
+        if gdrive_folder_id:
+            file_metadata['parents'] = [gdrive_folder_id]
+
+        media = MediaIoBaseUpload(derivative.stream(), mimetype=derivative.mimetype)
+        uploaded_file = service.files().create(
+            body=file_metadata,
+            media_body=media,
+            fields='id,webViewLink'
+        ).execute()
+        logger.info(f"🖼️ Uploaded preview {name}. File ID: {uploaded_file.get('id')}")
+        return uploaded_file
+    except Exception as e:
+        logger.error(f"❌ Failed to upload preview {name}: {e}")
+        return None
+
 
 class ComfyUIGDriveUploader:
     """
@@ -96,6 +143,8 @@ class ComfyUIGDriveUploader:
             },
             "optional": {
                 "use_proxy": ("BOOLEAN", {"default": False}),  # ← 动态开关！
+                "preview_sizes": ("STRING", {"default": ""}),  # e.g. "512,1280" → extra WebP previews
+                "wait_for_upload": ("BOOLEAN", {"default": True}),  # False → return immediately, upload in background
             },
             "hidden": {
                 "prompt": "PROMPT",
@@ -103,14 +152,17 @@ class ComfyUIGDriveUploader:
             },
         }
 
-    RETURN_TYPES = ()
+    RETURN_TYPES = ("UPLOAD_RESULTS",)
+    RETURN_NAMES = ("upload_results",)
     FUNCTION = "upload"
     OUTPUT_NODE = True
     CATEGORY = "image/upload"
 
-    def upload(self, images, filename_prefix="GDriveUpload", gdrive_folder_id="", use_proxy=False, prompt=None, extra_pnginfo=None):
+    def upload(self, images, filename_prefix="GDriveUpload", gdrive_folder_id="", use_proxy=False, preview_sizes="", wait_for_upload=True, prompt=None, extra_pnginfo=None):
         """
         Uploads images to Google Drive — proxy setting is DYNAMIC per call.
+        Images are saved locally here; the uploads themselves run on the shared
+        upload pool and the returned report resolves when they finish.
         """
         logger.info(f"Starting Google Drive upload process... (Proxy: {'ON' if use_proxy else 'OFF'})")
 
@@ -118,7 +170,7 @@ class ComfyUIGDriveUploader:
         service = create_drive_service(use_proxy=use_proxy)
         if not service:
             logger.error("🛑 Google Drive service creation failed. Aborting upload.")
-            return { "ui": { "images": [] } }
+            return { "ui": { "images": [] }, "result": (completed_report("gdrive"),) }
 
         # 动态导入 PngInfo
         try:
@@ -129,13 +181,18 @@ class ComfyUIGDriveUploader:
             PngInfo = None
             disable_metadata = True
 
+        sizes = parse_preview_sizes(preview_sizes)
         results = []
+        derivative_futures = []
 
         for batch_number, image in enumerate(images):
             # Convert tensor to PIL Image
             i = 255. * image.cpu().numpy()
             img = Image.fromarray(np.clip(i, 0, 255).astype(np.uint8))
 
+            # Start preview encodes so they overlap with the full-resolution PNG save
+            derivative_futures.append(start_derivatives(img, sizes))
+
             # Prepare metadata
             metadata = None
             if not disable_metadata and PngInfo:
@@ -148,45 +205,65 @@ class ComfyUIGDriveUploader:
 
             # Generate filename
             filename_with_batch_num = filename_prefix.replace("%batch_num%", str(batch_number))
-            file = f"{filename_with_batch_num}_{batch_number:05}.png"
-            local_file_path = os.path.join(self.output_dir, file)
 
             # Save locally
-            img.save(local_file_path, pnginfo=metadata, compress_level=self.compress_level)
+            with reserved_output_file(self.output_dir, filename_with_batch_num, batch_number) as (file, local_file_path):
+                img.save(local_file_path, pnginfo=metadata, compress_level=self.compress_level)
             logger.info(f"💾 Saved temporary image: {local_file_path}")
 
-            # Upload to Google Drive
+            results.append(UploadResult("gdrive", file, local_file_path))
+
+        report = submit_uploads("gdrive", results, self._upload_batch, service, derivative_futures, gdrive_folder_id)
+        report.add_done_callback(track_uploads)
+        if wait_for_upload:
+            report.result()
+
+        ui_images = []
+        for result in results:
+            failed = result.status == "failed"
+            ui_images.append({
+                "filename": result.filename + ("_FAILED" if failed else ""),
+                "subfolder": "",
+                "type": self.type
+            })
+
+        return { "ui": { "images": ui_images }, "result": (report,) }
+
+    def _upload_batch(self, results, service, derivative_futures, gdrive_folder_id):
+        """Runs on the upload pool: pushes each saved image (and its previews) to Drive."""
+        for result, futures in zip(results, derivative_futures):
+            result.start()
             try:
-                file_metadata = {'name': file}
+                file_metadata = {'name': result.filename}
                 if gdrive_folder_id:
                     file_metadata['parents'] = [gdrive_folder_id]
 
-                media = MediaFileUpload(local_file_path, mimetype='image/png')
-                uploaded_file = service.files().create(
-                    body=file_metadata,
-                    media_body=media,
-                    fields='id'
-                ).execute()
+                if is_large_file(result.local_path):
+                    uploaded_file = upload_large_to_drive(service, result.local_path, file_metadata, 'image/png', fields='id,webViewLink')
+                else:
+                    media = MediaFileUpload(result.local_path, mimetype='image/png')
+                    uploaded_file = service.files().create(
+                        body=file_metadata,
+                        media_body=media,
+                        fields='id,webViewLink'
+                    ).execute()
 
                 file_id = uploaded_file.get('id')
                 logger.info(f"☁️ Uploaded successfully. File ID: {file_id}")
-
-                results.append({
-                    "filename": file,
-                    "subfolder": "",
-                    "type": self.type
-                })
+                result.succeed(file_id, uploaded_file.get('webViewLink'), os.path.getsize(result.local_path),
+                               local_file_uploaded=True)
 
             except Exception as upload_e:
-                error_msg = f"❌ Failed to upload {file}: {upload_e}"
+                error_msg = f"❌ Failed to upload {result.filename}: {upload_e}"
                 logger.error(error_msg)
-                results.append({
-                    "filename": file + "_FAILED",
-                    "subfolder": "",
-                    "type": self.type
-                })
+                result.fail(upload_e)
+                continue
 
-        return { "ui": { "images": results } }
+            for derivative in collect_derivatives(futures):
+                uploaded_preview = upload_derivative(service, derivative, result.filename, gdrive_folder_id)
+                if uploaded_preview:
+                    result.add_derivative(derivative.filename_for(result.filename), uploaded_preview.get('id'),
+                                          uploaded_preview.get('webViewLink'), len(derivative.data))
 
 
 # --- Node Registration ---
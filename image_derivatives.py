@@ -0,0 +1,131 @@
+import io
+import os
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from PIL import Image
+
+# --- Configuration ---
+DEFAULT_PREVIEW_FORMAT = "WEBP"
+PREVIEW_QUALITY = 80
+TELEGRAM_PREVIEW_FORMAT = "JPEG"  # sendPhoto does not reliably accept WebP as a photo
+
+MIME_TYPES = {
+    "WEBP": "image/webp",
+    "JPEG": "image/jpeg",
+    "PNG": "image/png",
+}
+
+EXTENSIONS = {
+    "WEBP": "webp",
+    "JPEG": "jpg",
+    "PNG": "png",
+}
+
+# --- Logging Setup ---
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Pillow releases the GIL while encoding, so a small pool lets previews
+# be produced while the full-resolution PNG is being written to disk.
+_executor = ThreadPoolExecutor(max_workers=min(4, os.cpu_count() or 1), thread_name_prefix="preview")
+
+
+def parse_preview_sizes(value):
+    """Parses a comma separated list like "512,1280" into sorted unique ints."""
+    sizes = set()
+    for part in str(value or "").replace(";", ",").split(","):
+        part = part.strip().lower().rstrip("px")
+        if not part:
+            continue
+        try:
+            size = int(part)
+        except ValueError:
+            logger.warning(f"⚠️ Ignoring invalid preview size: {part!r}")
+            continue
+        if size > 0:
+            sizes.add(size)
+    return sorted(sizes)
+
+
+class ImageDerivative:
+    """An encoded, downscaled copy of an image kept in memory."""
+    def __init__(self, size, image_format, data, width, height):
+        self.size = size
+        self.format = image_format
+        self.data = data
+        self.width = width
+        self.height = height
+
+    @property
+    def mimetype(self):
+        return MIME_TYPES.get(self.format, "application/octet-stream")
+
+    @property
+    def extension(self):
+        return EXTENSIONS.get(self.format, self.format.lower())
+
+    def filename_for(self, filename):
+        """Derives the remote name, e.g. 'x_00000.png' -> 'x_00000_512px.webp'."""
+        stem = os.path.splitext(filename)[0]
+        return f"{stem}_{self.size}px.{self.extension}"
+
+    def stream(self):
+        return io.BytesIO(self.data)
+
+
+def encode_derivative(img, size, image_format=DEFAULT_PREVIEW_FORMAT, quality=PREVIEW_QUALITY):
+    """
+    Downscales `img` in place so its longest side is at most `size` and encodes it.
+    Images already smaller than `size` are re-encoded without upscaling.
+    Pass a copy: saving writes encoder state onto the Image object.
+    """
+    image_format = image_format.upper()
+    preview = img
+    if max(img.size) > size:
+        preview.thumbnail((size, size), Image.LANCZOS)
+    if image_format == "JPEG" and preview.mode not in ("RGB", "L"):
+        preview = preview.convert("RGB")
+
+    buffer = io.BytesIO()
+    if image_format == "PNG":
+        preview.save(buffer, format=image_format, compress_level=4)
+    else:
+        preview.save(buffer, format=image_format, quality=quality)
+    return ImageDerivative(size, image_format, buffer.getvalue(), preview.width, preview.height)
+
+
+def _encode_cascade(img, jobs, image_format, quality):
+    # Largest size first, so each smaller preview is downscaled from the previous one
+    for size, future in sorted(jobs, key=lambda job: job[0], reverse=True):
+        if not future.set_running_or_notify_cancel():
+            continue
+        try:
+            future.set_result(encode_derivative(img, size, image_format, quality))
+        except Exception as e:
+            future.set_exception(e)
+
+
+def start_derivatives(img, sizes, image_format=DEFAULT_PREVIEW_FORMAT, quality=PREVIEW_QUALITY):
+    """
+    Schedules preview encodes in the background and returns one future per size.
+    Call this before saving the full-resolution image so both run concurrently.
+    The worker gets a single private copy of `img`, so no Image object is saved
+    from two threads and only one extra full-size buffer is held per image.
+    """
+    if not sizes:
+        return []
+    jobs = [(size, Future()) for size in sizes]
+    _executor.submit(_encode_cascade, img.copy(), jobs, image_format, quality)
+    return [future for _size, future in jobs]
+
+
+def collect_derivatives(futures):
+    """Waits for `start_derivatives` futures, dropping (and logging) failed encodes."""
+    derivatives = []
+    for future in futures:
+        try:
+            derivatives.append(future.result())
+        except Exception as e:
+            logger.error(f"❌ Failed to encode preview: {e}")
+    return derivatives
@@ -0,0 +1,108 @@
+import os
+import mmap
+import queue
+import logging
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+# --- Configuration ---
+# Files above this size go through chunked upload sessions instead of a single request.
+LARGE_FILE_THRESHOLD = 4 * 1024 * 1024
+# OneDrive fragments must be multiples of 320 KiB; Drive chunks multiples of 256 KiB.
+ONEDRIVE_CHUNK_SIZE = 32 * 320 * 1024
+DRIVE_CHUNK_SIZE = 32 * 256 * 1024
+# Chunks read ahead of the one currently being sent
+PREFETCH_CHUNKS = 2
+# Upload sessions kept in flight at once when a batch holds several files
+MAX_PARALLEL_SESSIONS = 3
+
+# --- Logging Setup ---
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def is_large_file(file_path, threshold=LARGE_FILE_THRESHOLD):
+    try:
+        return os.path.getsize(file_path) > threshold
+    except OSError:
+        return False
+
+
+@contextmanager
+def mapped_file(file_path):
+    """Memory-maps a file read-only. Yields None for empty files, which cannot be mapped."""
+    with open(file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield None
+            return
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            yield mm
+        finally:
+            mm.close()
+
+
+def prefetch_window(mm, offset, length):
+    """Asks the OS to start paging in [offset, offset + length) ahead of use, where supported."""
+    if mm is None or not hasattr(mm, "madvise") or not hasattr(mmap, "MADV_WILLNEED"):
+        return
+    start = offset - offset % mmap.PAGESIZE
+    length = min(length + offset - start, len(mm) - start)
+    if length > 0:
+        try:
+            mm.madvise(mmap.MADV_WILLNEED, start, length)
+        except (OSError, ValueError):
+            pass
+
+
+def iter_chunks(file_path, chunk_size, prefetch=PREFETCH_CHUNKS):
+    """
+    Yields (offset, chunk, total_size) for a file, reading through a memory map.
+    A reader thread stays up to `prefetch` chunks ahead so disk reads overlap
+    with whatever the consumer does with the previous chunk (usually sending it).
+    """
+    chunks = queue.Queue(maxsize=max(1, prefetch))
+    stop = threading.Event()
+    _done = object()
+
+    def reader():
+        try:
+            with mapped_file(file_path) as mm:
+                total = len(mm) if mm is not None else 0
+                for offset in range(0, total, chunk_size):
+                    if stop.is_set():
+                        return
+                    chunks.put((offset, mm[offset:offset + chunk_size], total))
+        except Exception as e:
+            chunks.put(e)
+        finally:
+            chunks.put(_done)
+
+    thread = threading.Thread(target=reader, name="chunk-reader", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = chunks.get()
+            if item is _done:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        # Unblock the reader if the consumer stopped early
+        stop.set()
+        while thread.is_alive():
+            try:
+                chunks.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+
+def run_overlapped(fn, items, max_sessions=MAX_PARALLEL_SESSIONS):
+    """Calls fn(item) for every item with up to `max_sessions` in flight; results keep input order."""
+    items = list(items)
+    if max_sessions <= 1 or len(items) <= 1:
+        return [fn(item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(max_sessions, len(items)), thread_name_prefix="session") as pool:
+        return list(pool.map(fn, items))
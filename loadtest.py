@@ -0,0 +1,598 @@
+"""
+Load-test driver for the uploader nodes.
+
+Replays a recorded or synthetic prompt stream against ComfyUIGDriveUploader,
+ComfyUIOneDriveUploader and TelegramImagePoster without a running ComfyUI:
+`folder_paths` is stubbed and all three services are served by a local mock
+HTTP server with configurable latency, per-stream bandwidth and error rate.
+Reports throughput, queue depth, memory high-water mark and tail latency.
+
+Usage:
+    python loadtest.py --synthetic 200 --concurrency 4
+    python loadtest.py --trace prompts.jsonl --latency-ms 150 --stream-mbps 20 --json report.json
+
+Trace format (one JSON object per line, `t` in seconds from the start):
+    {"t": 0.0, "destination": "onedrive", "batch": 4, "width": 1024, "height": 1024}
+
+Requires the node dependencies (torch, Pillow, requests, google-api-python-client,
+python-telegram-bot); destinations whose module cannot be imported are skipped.
+"""
+import os
+import re
+import sys
+import json
+import math
+import time
+import types
+import random
+import shutil
+import asyncio
+import argparse
+import importlib
+import itertools
+import logging
+import tempfile
+import threading
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# --- Configuration ---
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+PACKAGE_NAME = "comfyui_gdrive_uploader"
+NODE_MODULES = {
+    "gdrive": "gdrive_uploader_node",
+    "onedrive": "onedrive_uploader_node",
+    "telegram": "telegram_poster_node",
+}
+DEFAULT_RESOLUTIONS = "512x512,768x1024,1024x1024,2048x2048"
+
+logger = logging.getLogger("loadtest")
+
+
+# --- Mock endpoints ---
+
+class MockEndpoints(ThreadingHTTPServer):
+    """
+    Local stand-in for the Graph, Drive and Telegram Bot APIs.
+    Every request waits `latency` seconds plus its body size divided by
+    `stream_bps`, i.e. each connection behaves like one throttled TCP stream.
+    """
+    daemon_threads = True
+
+    def __init__(self, latency=0.0, stream_bps=0, error_rate=0.0):
+        super().__init__(("127.0.0.1", 0), _MockHandler)
+        self.latency = latency
+        self.stream_bps = stream_bps
+        self.error_rate = error_rate
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)
+        self.folders = {}
+        self.sessions = {}
+        self.requests = 0
+        self.bytes_received = 0
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, name="mock-endpoints", daemon=True).start()
+        return self
+
+    def next_id(self, kind):
+        with self.lock:
+            return f"{kind}-{next(self.ids)}"
+
+    def record(self, nbytes):
+        with self.lock:
+            self.requests += 1
+            self.bytes_received += nbytes
+
+    def throttle(self, nbytes):
+        delay = self.latency + (nbytes / self.stream_bps if self.stream_bps else 0)
+        if delay > 0:
+            time.sleep(delay)
+
+
+class _MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _read_body(self):
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            data = bytearray()
+            while True:
+                size = int(self.rfile.readline().split(b";")[0].strip() or b"0", 16)
+                if size == 0:
+                    while self.rfile.readline() not in (b"\r\n", b"\n", b""):
+                        pass
+                    return bytes(data)
+                data += self.rfile.read(size)
+                self.rfile.readline()
+        return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+    def _send(self, status, payload=None, headers=None):
+        body = json.dumps(payload).encode() if payload is not None else b""
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        if payload is not None:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self):
+        server = self.server
+        body = self._read_body()
+        server.record(len(body))
+        server.throttle(len(body))
+
+        if body and server.error_rate and random.random() < server.error_rate:
+            return self._send(503, {"error": "injected failure"})
+
+        url = urlsplit(self.path)
+        status, payload, headers = self._route(self.command, url.path, parse_qs(url.query), body)
+        self._send(status, payload, headers)
+
+    do_GET = do_POST = do_PUT = do_DELETE = _handle
+
+    def _item(self, name, size, kind="item"):
+        item_id = self.server.next_id(kind)
+        return {"id": item_id, "name": name, "size": size, "webUrl": f"{self.server.url}/view/{item_id}"}
+
+    def _route(self, method, path, query, body):
+        server = self.server
+
+        # --- Microsoft Graph ---
+        if path == "/v1.0/me/drive/root/children":
+            if method == "GET":
+                with server.lock:
+                    folders = [{"id": fid, "name": name, "folder": {}} for name, fid in server.folders.items()]
+                return 200, {"value": folders}, None
+            name = json.loads(body or b"{}").get("name", "folder")
+            with server.lock:
+                folder_id = server.folders.setdefault(name, f"folder-{len(server.folders) + 1}")
+            return 201, {"id": folder_id, "name": name, "folder": {}}, None
+
+        match = re.fullmatch(r"/v1\.0/me/drive/items/[^/:]+:/(.+):/(content|createUploadSession)", path)
+        if match and method in ("PUT", "POST"):
+            name, action = match.groups()
+            if action == "content":
+                return 201, self._item(name, len(body)), None
+            session_id = server.next_id("session")
+            with server.lock:
+                server.sessions[session_id] = {"name": name, "received": 0}
+            return 200, {"uploadUrl": f"{server.url}/sessions/onedrive/{session_id}"}, None
+
+        # --- Google Drive ---
+        if path == "/upload/drive/v3/files" and method == "POST":
+            if query.get("uploadType") == ["resumable"]:
+                session_id = server.next_id("session")
+                with server.lock:
+                    server.sessions[session_id] = {"name": "drive-file", "received": 0}
+                return 200, None, {"Location": f"{server.url}/sessions/drive/{session_id}"}
+            file_id = server.next_id("drive")
+            return 200, {"id": file_id, "webViewLink": f"{server.url}/view/{file_id}"}, None
+
+        # --- Upload sessions (both services) ---
+        match = re.fullmatch(r"/sessions/(onedrive|drive)/(.+)", path)
+        if match:
+            service, session_id = match.groups()
+            with server.lock:
+                session = server.sessions.get(session_id)
+            if session is None:
+                return 404, {"error": "unknown upload session"}, None
+            if method == "DELETE":
+                with server.lock:
+                    server.sessions.pop(session_id, None)
+                return 204, None, None
+
+            content_range = self.headers.get("Content-Range", "")
+            range_match = re.fullmatch(r"bytes (\d+)-(\d+)/(\d+)", content_range)
+            if range_match:
+                start, end, total = map(int, range_match.groups())
+                session["received"] = end + 1
+            else:
+                total = int(content_range.rsplit("/", 1)[-1]) if "/" in content_range else -1
+
+            if session["received"] >= total >= 0:
+                with server.lock:
+                    server.sessions.pop(session_id, None)
+                if service == "drive":
+                    file_id = server.next_id("drive")
+                    return 200, {"id": file_id, "webViewLink": f"{server.url}/view/{file_id}"}, None
+                return 201, self._item(session["name"], total), None
+            if service == "drive":
+                headers = {"Range": f"bytes=0-{session['received'] - 1}"} if session["received"] else {}
+                return 308, None, headers
+            return 202, {"nextExpectedRanges": [f"{session['received']}-"]}, None
+
+        # --- Telegram Bot API ---
+        match = re.fullmatch(r"/bot[^/]+/(\w+)", path)
+        if match:
+            api_method = match.group(1)
+            if api_method == "getMe":
+                return 200, {"ok": True, "result": {"id": 1, "is_bot": True, "first_name": "loadtest", "username": "loadtest_bot"}}, None
+            if api_method == "sendPhoto":
+                message_id = int(server.next_id("message").split("-")[1])
+                return 200, {"ok": True, "result": {
+                    "message_id": message_id,
+                    "date": int(time.time()),
+                    "chat": {"id": 1, "type": "private"},
+                    "photo": [{"file_id": f"photo{message_id}", "file_unique_id": f"u{message_id}", "width": 1, "height": 1}],
+                }}, None
+
+        return 404, {"error": f"no mock for {method} {path}"}, None
+
+
+class _DriveHttp:
+    """Minimal httplib2 stand-in that sends googleapiclient requests to the mock server."""
+    def __init__(self, base_url):
+        import httplib2
+        import requests
+        self._httplib2 = httplib2
+        self._session = requests.Session()
+        self._base = urlsplit(base_url)
+
+    def request(self, uri, method="GET", body=None, headers=None, redirections=5, connection_type=None):
+        target = urlsplit(uri)._replace(scheme=self._base.scheme, netloc=self._base.netloc).geturl()
+        response = self._session.request(method, target, data=body, headers=headers, allow_redirects=False)
+        info = {key.lower(): value for key, value in response.headers.items()}
+        info["status"] = str(response.status_code)
+        return self._httplib2.Response(info), response.content
+
+
+# --- Node loading ---
+
+def load_nodes(output_dir, destinations, mock, retention_mb=0):
+    """
+    Imports the node modules with `folder_paths` stubbed, without running the
+    package __init__ (which would try to pip-install dependencies), and points
+    them at the mock endpoints. Returns {destination: module}.
+    """
+    folder_paths = types.ModuleType("folder_paths")
+    folder_paths.get_output_directory = lambda: output_dir
+    sys.modules["folder_paths"] = folder_paths
+
+    package = types.ModuleType(PACKAGE_NAME)
+    package.__path__ = [PACKAGE_DIR]
+    sys.modules.setdefault(PACKAGE_NAME, package)
+
+    retention = importlib.import_module(f"{PACKAGE_NAME}.retention")
+    retention._manager = retention.RetentionManager(
+        {"enabled": retention_mb > 0, "max_age_hours": 0, "max_total_mb": retention_mb, "interval_seconds": 1},
+        manifest_file=os.path.join(output_dir, "retention_manifest.json"))
+
+    modules = {}
+    for destination in destinations:
+        try:
+            modules[destination] = importlib.import_module(f"{PACKAGE_NAME}.{NODE_MODULES[destination]}")
+        except ImportError as e:
+            logger.warning(f"⚠️ Skipping {destination}: {e}")
+
+    if "gdrive" in modules:
+        gdrive = modules["gdrive"]
+        gdrive.create_drive_service = lambda use_proxy=False: gdrive.build(
+            "drive", "v3", http=_DriveHttp(mock.url), static_discovery=True)
+    if "onedrive" in modules:
+        onedrive = modules["onedrive"]
+        onedrive.GRAPH_API_URL = f"{mock.url}/v1.0"
+        onedrive.get_access_token = lambda: "loadtest-token"
+    if "telegram" in modules:
+        telegram = modules["telegram"]
+        telegram.TELEGRAM_API_URL = f"{mock.url}/bot"
+        telegram.load_telegram_config = lambda: ("123456:LOADTEST", "1")
+    return modules
+
+
+# --- Traces ---
+
+def parse_resolutions(value):
+    resolutions = []
+    for part in value.split(","):
+        width, _, height = part.strip().lower().partition("x")
+        resolutions.append((int(width), int(height or width)))
+    return resolutions
+
+
+def synthetic_trace(count, rate, burstiness, destinations, resolutions, max_batch, seed=0):
+    """
+    Poisson arrivals at `rate` prompts/s; with probability `burstiness` an
+    arrival is a burst of 2-6 prompts queued almost at once.
+    """
+    rng = random.Random(seed)
+    events = []
+    t = 0.0
+    while len(events) < count:
+        burst = rng.randint(2, 6) if rng.random() < burstiness else 1
+        for _ in range(min(burst, count - len(events))):
+            width, height = rng.choice(resolutions)
+            events.append({
+                "t": round(t + rng.uniform(0, 0.05), 3),
+                "destination": rng.choice(destinations),
+                "batch": rng.randint(1, max_batch),
+                "width": width,
+                "height": height,
+            })
+        t += rng.expovariate(rate)
+    return sorted(events, key=lambda event: event["t"])
+
+
+def load_trace(path):
+    events = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            event = json.loads(line)
+            if event.get("destination") not in NODE_MODULES:
+                raise ValueError(f"{path}:{line_number}: unknown destination {event.get('destination')!r}")
+            event.setdefault("t", 0.0)
+            event.setdefault("batch", 1)
+            event.setdefault("width", 1024)
+            event.setdefault("height", event["width"])
+            events.append(event)
+    return sorted(events, key=lambda event: event["t"])
+
+
+def save_trace(events, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        for event in events:
+            f.write(json.dumps(event) + "\n")
+
+
+# --- Running ---
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def max_rss_bytes():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+class LoadTest:
+    def __init__(self, modules, events, args):
+        import torch
+        self.torch = torch
+        self.modules = modules
+        self.events = [event for event in events if event["destination"] in modules]
+        self.args = args
+        self.upload_results = sys.modules[f"{PACKAGE_NAME}.upload_results"]
+        self.nodes = {
+            "gdrive": lambda: modules["gdrive"].ComfyUIGDriveUploader(),
+            "onedrive": lambda: modules["onedrive"].ComfyUIOneDriveUploader(),
+            "telegram": lambda: modules["telegram"].TelegramImagePoster(),
+        }
+        self.lock = threading.Lock()
+        self.prompt_latency = defaultdict(list)
+        self.upload_latency = defaultdict(list)
+        self.prompts = Counter()
+        self.statuses = defaultdict(Counter)
+        self.bytes_uploaded = 0
+        self.images = 0
+        self.waiting_prompts = 0
+        self.outstanding_reports = 0
+        # Signalled by on_done once every report's stats have been recorded
+        self.reports_recorded = threading.Condition(self.lock)
+        self.samples = []
+
+    def _call_node(self, destination, images):
+        args = self.args
+        node = self.nodes[destination]()
+        wait = not args.background
+        if destination == "gdrive":
+            output = node.upload(images, filename_prefix="LoadTest", preview_sizes=args.preview_sizes, wait_for_upload=wait)
+        elif destination == "onedrive":
+            output = node.process(images, filename_prefix="LoadTest", onedrive_folder_path="/LoadTest",
+                                  preview_sizes=args.preview_sizes, wait_for_upload=wait)
+        else:
+            output = asyncio.run(node.post_and_preview(images, filename_prefix="LoadTest",
+                                                       preview_size=args.telegram_preview_size, wait_for_upload=wait))
+        return output["result"][0]
+
+    def _run_prompt(self, event, arrival):
+        destination = event["destination"]
+        with self.lock:
+            self.waiting_prompts -= 1
+        images = self.torch.rand(event["batch"], event["height"], event["width"], 3)
+        report = self._call_node(destination, images)
+        returned = time.monotonic()
+        del images
+
+        def on_done(report):
+            finished = time.monotonic()
+            with self.lock:
+                self.upload_latency[destination].append(finished - arrival)
+                for result in report.results:
+                    self.statuses[destination][result.status] += 1
+                    self.bytes_uploaded += result.bytes + sum(d["bytes"] for d in result.derivatives)
+                self.images += len(report.results)
+                self.outstanding_reports -= 1
+                if self.outstanding_reports == 0:
+                    self.reports_recorded.notify_all()
+
+        with self.lock:
+            self.prompts[destination] += 1
+            self.prompt_latency[destination].append(returned - arrival)
+            self.outstanding_reports += 1
+        report.add_done_callback(on_done)
+        return report
+
+    def _sample(self, stop):
+        while not stop.wait(self.args.sample_interval):
+            with self.lock:
+                self.samples.append({
+                    "upload_jobs_queued": self.upload_results.pending_uploads(),
+                    "uploads_outstanding": self.outstanding_reports,
+                    "prompts_waiting": self.waiting_prompts,
+                })
+
+    def run(self):
+        args = self.args
+        stop = threading.Event()
+        sampler = threading.Thread(target=self._sample, args=(stop,), name="sampler", daemon=True)
+        sampler.start()
+
+        start = time.monotonic()
+        futures = []
+        with ThreadPoolExecutor(max_workers=args.concurrency, thread_name_prefix="prompt") as pool:
+            for event in self.events:
+                arrival = start + event["t"] / args.speed
+                delay = arrival - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                with self.lock:
+                    self.waiting_prompts += 1
+                futures.append(pool.submit(self._run_prompt, event, arrival))
+            for future in futures:
+                future.result()
+        # With --background the nodes return early. Wait for on_done to record every
+        # report: report.result() can return before its done-callbacks have run.
+        with self.reports_recorded:
+            self.reports_recorded.wait_for(lambda: self.outstanding_reports == 0)
+        elapsed = time.monotonic() - start
+
+        stop.set()
+        sampler.join()
+        return self.summary(elapsed)
+
+    def summary(self, elapsed):
+        def latency_stats(values):
+            return {
+                "p50": percentile(values, 50),
+                "p95": percentile(values, 95),
+                "p99": percentile(values, 99),
+                "max": max(values) if values else None,
+            }
+
+        def series_stats(key):
+            values = [sample[key] for sample in self.samples] or [0]
+            return {"max": max(values), "mean": round(sum(values) / len(values), 2)}
+
+        return {
+            "elapsed_s": round(elapsed, 3),
+            "prompts": sum(self.prompts.values()),
+            "images": self.images,
+            "images_per_s": round(self.images / elapsed, 2) if elapsed else None,
+            "mb_uploaded": round(self.bytes_uploaded / 1e6, 2),
+            "mb_per_s": round(self.bytes_uploaded / 1e6 / elapsed, 2) if elapsed else None,
+            "queue_depth": {
+                "upload_jobs_queued": series_stats("upload_jobs_queued"),
+                "uploads_outstanding": series_stats("uploads_outstanding"),
+                "prompts_waiting": series_stats("prompts_waiting"),
+            },
+            "max_rss_mb": round(max_rss_bytes() / 1e6, 1) if max_rss_bytes() else None,
+            "destinations": {
+                destination: {
+                    "prompts": self.prompts[destination],
+                    "statuses": dict(self.statuses[destination]),
+                    "prompt_latency_s": latency_stats(self.prompt_latency[destination]),
+                    "upload_latency_s": latency_stats(self.upload_latency[destination]),
+                }
+                for destination in sorted(self.prompts)
+            },
+        }
+
+
+def print_summary(summary, mock):
+    def fmt(stats):
+        return "/".join("-" if stats[key] is None else f"{stats[key]:.2f}" for key in ("p50", "p95", "p99", "max"))
+
+    queue = summary["queue_depth"]
+    print()
+    print(f"Load test: {summary['prompts']} prompts, {summary['images']} images in {summary['elapsed_s']:.1f}s")
+    print(f"  throughput   {summary['images_per_s']} images/s, {summary['mb_per_s']} MB/s ({summary['mb_uploaded']} MB uploaded)")
+    print(f"  queue depth  upload jobs queued max {queue['upload_jobs_queued']['max']} (mean {queue['upload_jobs_queued']['mean']}), "
+          f"uploads outstanding max {queue['uploads_outstanding']['max']}, prompts waiting max {queue['prompts_waiting']['max']}")
+    print(f"  memory       peak RSS {summary['max_rss_mb'] if summary['max_rss_mb'] is not None else 'n/a'} MB")
+    print(f"  mock         {mock.requests} requests, {mock.bytes_received / 1e6:.1f} MB received")
+    print()
+    print(f"  {'destination':<12}{'prompts':>8}  {'statuses':<28}{'prompt p50/p95/p99/max (s)':<30}{'upload p50/p95/p99/max (s)'}")
+    for destination, stats in summary["destinations"].items():
+        statuses = ", ".join(f"{status} {count}" for status, count in sorted(stats["statuses"].items()))
+        print(f"  {destination:<12}{stats['prompts']:>8}  {statuses:<28}{fmt(stats['prompt_latency_s']):<30}{fmt(stats['upload_latency_s'])}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a prompt stream against the uploader nodes using local mock endpoints.")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--trace", help="JSON-lines trace to replay")
+    source.add_argument("--synthetic", type=int, default=50, help="number of synthetic prompts to generate (default: 50)")
+    parser.add_argument("--save-trace", help="write the trace that was run to this file, for later replay")
+    parser.add_argument("--destinations", default="gdrive,onedrive,telegram", help="comma separated subset to exercise")
+    parser.add_argument("--rate", type=float, default=2.0, help="synthetic arrivals per second (default: 2)")
+    parser.add_argument("--burstiness", type=float, default=0.2, help="probability an arrival is a burst (default: 0.2)")
+    parser.add_argument("--max-batch", type=int, default=4, help="largest synthetic batch size (default: 4)")
+    parser.add_argument("--resolutions", default=DEFAULT_RESOLUTIONS, help=f"synthetic resolutions (default: {DEFAULT_RESOLUTIONS})")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed multiplier (default: 1)")
+    parser.add_argument("--concurrency", type=int, default=2, help="prompts executed at the same time (default: 2)")
+    parser.add_argument("--background", action="store_true", help="run nodes with wait_for_upload off")
+    parser.add_argument("--preview-sizes", default="", help="Drive/OneDrive preview_sizes input, e.g. 512,1280")
+    parser.add_argument("--telegram-preview-size", type=int, default=1280)
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="mock per-request latency (default: 50)")
+    parser.add_argument("--stream-mbps", type=float, default=100.0, help="mock per-connection bandwidth in Mbit/s, 0 = unlimited (default: 100)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of uploads the mock fails with 503")
+    parser.add_argument("--retention-mb", type=float, default=0, help="enable retention with this size budget during the run")
+    parser.add_argument("--sample-interval", type=float, default=0.05, help="queue depth sampling period in seconds")
+    parser.add_argument("--output-dir", help="where nodes write files (default: a temporary directory, removed afterwards)")
+    parser.add_argument("--json", help="also write the summary as JSON to this file")
+    parser.add_argument("--verbose", action="store_true", help="show node logs")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+
+    destinations = [d.strip() for d in args.destinations.split(",") if d.strip()]
+    unknown = [d for d in destinations if d not in NODE_MODULES]
+    if unknown:
+        parser.error(f"unknown destination(s): {', '.join(unknown)}")
+
+    if args.trace:
+        events = [event for event in load_trace(args.trace) if event["destination"] in destinations]
+    else:
+        events = synthetic_trace(args.synthetic, args.rate, args.burstiness, destinations,
+                                 parse_resolutions(args.resolutions), args.max_batch, args.seed)
+    if args.save_trace:
+        save_trace(events, args.save_trace)
+
+    output_dir = args.output_dir or tempfile.mkdtemp(prefix="uploader-loadtest-")
+    os.makedirs(output_dir, exist_ok=True)
+    mock = MockEndpoints(args.latency_ms / 1000, args.stream_mbps * 1e6 / 8, args.error_rate).start()
+    try:
+        modules = load_nodes(output_dir, destinations, mock, args.retention_mb)
+        if not modules:
+            print("No destination could be loaded; install the node dependencies first.", file=sys.stderr)
+            return 1
+        summary = LoadTest(modules, events, args).run()
+    finally:
+        mock.shutdown()
+        if not args.output_dir:
+            shutil.rmtree(output_dir, ignore_errors=True)
+
+    print_summary(summary, mock)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
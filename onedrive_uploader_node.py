@@ -7,12 +7,17 @@ import requests
 import json
 import logging
 import time
-import uuid
+
+from .image_derivatives import parse_preview_sizes, start_derivatives, collect_derivatives
+from .upload_results import UploadResult, submit_uploads, completed_report
+from .retention import reserved_output_file, track_uploads
+from .large_upload import ONEDRIVE_CHUNK_SIZE, MAX_PARALLEL_SESSIONS, is_large_file, iter_chunks, run_overlapped
 
 # --- Configuration ---
 # Path to the config file
 CONFIG_FILE = os.path.join(os.path.dirname(__file__), "config.json")
 TOKEN_FILE = os.path.join(os.path.dirname(__file__), "onedrive_token.json") # Keep token file path
+GRAPH_API_URL = "https://graph.microsoft.com/v1.0"
 
 # Default placeholders (fallback if config file is missing/invalid)
 CLIENT_ID_DEFAULT = "YOUR_ONEDRIVE_APP_CLIENT_ID_PLACEHOLDER"
@@ -182,13 +187,13 @@ def initiate_auth_flow():
         logger.error(f"Failed to initiate auth flow: {e}")
         return False
 
-def upload_to_onedrive(file_path, access_token, folder_path="/ComfyUI Uploads"):
-    """Uploads a file to OneDrive."""
+def get_onedrive_folder_id(access_token, folder_path="/ComfyUI Uploads"):
+    """Finds (or creates) the upload folder under the drive root and returns its ID."""
     folder_id = "root"
     if folder_path and folder_path != "/":
         folder_name = os.path.basename(folder_path.rstrip('/'))
         if folder_name:
-             search_url = f"https://graph.microsoft.com/v1.0/me/drive/root/children"
+             search_url = f"{GRAPH_API_URL}/me/drive/root/children"
              headers = {'Authorization': f'Bearer {access_token}'}
              try:
                  response = requests.get(search_url, headers=headers)
@@ -201,7 +206,7 @@ def upload_to_onedrive(file_path, access_token, folder_path="/ComfyUI Uploads"):
                          break
                  else:
                      logger.info(f"Folder '{folder_name}' not found, creating it...")
-                     create_folder_url = f"https://graph.microsoft.com/v1.0/me/drive/root/children"
+                     create_folder_url = f"{GRAPH_API_URL}/me/drive/root/children"
                      folder_metadata = {
                          "name": folder_name,
                          "folder": {}
@@ -214,9 +219,79 @@ def upload_to_onedrive(file_path, access_token, folder_path="/ComfyUI Uploads"):
              except requests.exceptions.RequestException as e:
                   logger.error(f"Error finding/creating folder '{folder_path}': {e}. Uploading to root.")
                   folder_id = "root"
+    return folder_id
+
+def upload_bytes_to_onedrive(data, filename, access_token, folder_id="root"):
+    """Uploads in-memory content (e.g. a preview derivative) into an already resolved folder."""
+    upload_url = f"{GRAPH_API_URL}/me/drive/items/{folder_id}:/{filename}:/content"
+
+    headers = {
+        'Authorization': f'Bearer {access_token}',
+    }
+    try:
+        response = requests.put(upload_url, headers=headers, data=data)
+        response.raise_for_status()
+        uploaded_file_info = response.json()
+        logger.info(f"File uploaded successfully. ID: {uploaded_file_info.get('id')}, Name: {uploaded_file_info.get('name')}")
+        return uploaded_file_info
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Failed to upload '{filename}': {e}")
+        if hasattr(e, 'response') and e.response is not None:
+            logger.error(f"Response text: {e.response.text}")
+        return None
 
+def upload_large_to_onedrive(file_path, access_token, folder_id="root", chunk_size=ONEDRIVE_CHUNK_SIZE):
+    """
+    Uploads a large file through a Graph upload session, sending it in fragments.
+    Fragments are read from a memory map ahead of the one in flight.
+    """
     filename = os.path.basename(file_path)
-    upload_url = f"https://graph.microsoft.com/v1.0/me/drive/items/{folder_id}:/{filename}:/content"
+    session_url = f"{GRAPH_API_URL}/me/drive/items/{folder_id}:/{filename}:/createUploadSession"
+    headers = {
+        'Authorization': f'Bearer {access_token}',
+    }
+    upload_url = None
+    try:
+        response = requests.post(session_url, headers=headers, json={"item": {"@microsoft.graph.conflictBehavior": "replace"}})
+        response.raise_for_status()
+        upload_url = response.json()['uploadUrl']
+
+        # The upload URL is pre-authenticated; sending the bearer token to it is rejected
+        for offset, chunk, total in iter_chunks(file_path, chunk_size):
+            chunk_headers = {
+                'Content-Length': str(len(chunk)),
+                'Content-Range': f"bytes {offset}-{offset + len(chunk) - 1}/{total}",
+            }
+            response = requests.put(upload_url, headers=chunk_headers, data=chunk)
+            response.raise_for_status()
+
+        uploaded_file_info = response.json()
+        logger.info(f"Large file uploaded successfully. ID: {uploaded_file_info.get('id')}, Name: {uploaded_file_info.get('name')}")
+        return uploaded_file_info
+    except (requests.exceptions.RequestException, OSError, KeyError) as e:
+        logger.error(f"Failed to upload large file '{file_path}': {e}")
+        if hasattr(e, 'response') and e.response is not None:
+            logger.error(f"Response text: {e.response.text}")
+        if upload_url:
+            try:
+                requests.delete(upload_url)
+            except requests.exceptions.RequestException:
+                pass
+        return None
+
+def upload_to_onedrive(file_path, access_token, folder_path="/ComfyUI Uploads", folder_id=None):
+    """
+    Uploads a file to OneDrive. Pass `folder_id` to skip the folder lookup.
+    Files above LARGE_FILE_THRESHOLD are sent through an upload session.
+    """
+    if folder_id is None:
+        folder_id = get_onedrive_folder_id(access_token, folder_path)
+
+    if is_large_file(file_path):
+        return upload_large_to_onedrive(file_path, access_token, folder_id)
+
+    filename = os.path.basename(file_path)
+    upload_url = f"{GRAPH_API_URL}/me/drive/items/{folder_id}:/{filename}:/content"
 
     headers = {
         'Authorization': f'Bearer {access_token}',
@@ -254,20 +329,26 @@ class ComfyUIOneDriveUploader:
                 "onedrive_folder_path": ("STRING", {"default": "/ComfyUI Uploads"}),
                 "authenticate": ("BOOLEAN", {"default": False}),
             },
+            "optional": {
+                "preview_sizes": ("STRING", {"default": ""}),  # e.g. "512,1280" → extra WebP previews
+                "wait_for_upload": ("BOOLEAN", {"default": True}),  # False → return immediately, upload in background
+            },
             "hidden": {
                 "prompt": "PROMPT",
                 "extra_pnginfo": "EXTRA_PNGINFO"
             },
         }
 
-    RETURN_TYPES = ()
+    RETURN_TYPES = ("UPLOAD_RESULTS",)
+    RETURN_NAMES = ("upload_results",)
     FUNCTION = "process"
     OUTPUT_NODE = True
     CATEGORY = "image/upload"
 
-    def process(self, images, filename_prefix="OneDriveUpload", onedrive_folder_path="/ComfyUI Uploads", authenticate=False, prompt=None, extra_pnginfo=None):
+    def process(self, images, filename_prefix="OneDriveUpload", onedrive_folder_path="/ComfyUI Uploads", authenticate=False, preview_sizes="", wait_for_upload=True, prompt=None, extra_pnginfo=None):
         """
         Processes images: saves locally, uploads to OneDrive, prepares preview.
+        Uploads run on the shared upload pool; the returned report resolves when they finish.
         """
         logger.info("Starting OneDrive upload and preview process...")
 
@@ -276,46 +357,76 @@ class ComfyUIOneDriveUploader:
             auth_success = initiate_auth_flow()
             if not auth_success:
                  logger.error("Authentication failed or cancelled.")
-                 return { "ui": { "images": [] } }
+                 return { "ui": { "images": [] }, "result": (completed_report("onedrive"),) }
 
         access_token = get_access_token()
         if not access_token:
             error_msg = "No valid access token available. Please authenticate first."
             logger.error(error_msg)
-            return { "ui": { "images": [] } }
+            return { "ui": { "images": [] }, "result": (completed_report("onedrive"),) }
 
+        sizes = parse_preview_sizes(preview_sizes)
 
         results = []
+        derivative_futures = []
         for (batch_number, image) in enumerate(images):
             i = 255. * image.cpu().numpy()
             img = Image.fromarray(np.clip(i, 0, 255).astype(np.uint8))
+            derivative_futures.append(start_derivatives(img, sizes))
             metadata = None
 
             filename_with_batch_num = filename_prefix.replace("%batch_num%", str(batch_number))
-            file = f"{filename_with_batch_num}_{batch_number:05}_{uuid.uuid4().hex[:8]}.png"
-            local_file_path = os.path.join(self.output_dir, file)
-
-            img.save(local_file_path, pnginfo=metadata, compress_level=self.compress_level)
+            with reserved_output_file(self.output_dir, filename_with_batch_num, batch_number) as (file, local_file_path):
+                img.save(local_file_path, pnginfo=metadata, compress_level=self.compress_level)
             logger.info(f"Saved temporary image locally: {local_file_path}")
 
-            uploaded_file_info = upload_to_onedrive(local_file_path, access_token, onedrive_folder_path)
-            if uploaded_file_info:
-                logger.info(f'Image uploaded successfully to OneDrive.')
-                results.append({
-                    "filename": file,
-                    "subfolder": "",
-                    "type": self.type
-                })
-            else:
-                error_msg = f"Failed to upload image {file} to OneDrive."
+            results.append(UploadResult("onedrive", file, local_file_path))
+
+        report = submit_uploads("onedrive", results, self._upload_batch, access_token, onedrive_folder_path, derivative_futures)
+        report.add_done_callback(track_uploads)
+        if wait_for_upload:
+            report.result()
+
+        ui_images = []
+        for result in results:
+            failed = result.status == "failed"
+            ui_images.append({
+                "filename": result.filename + ("_FAILED" if failed else ""),
+                "subfolder": "",
+                "type": self.type
+            })
+
+        return { "ui": { "images": ui_images }, "result": (report,) }
+
+    def _upload_batch(self, results, access_token, onedrive_folder_path, derivative_futures):
+        """Runs on the upload pool: pushes each saved image (and its previews) to OneDrive."""
+        # Resolve the target folder once per batch instead of once per image
+        folder_id = get_onedrive_folder_id(access_token, onedrive_folder_path)
+
+        def upload_one(item):
+            result, futures = item
+            result.start()
+            uploaded_file_info = upload_to_onedrive(result.local_path, access_token, onedrive_folder_path, folder_id=folder_id)
+            if not uploaded_file_info:
+                error_msg = f"Failed to upload image {result.filename} to OneDrive."
                 logger.error(error_msg)
-                results.append({
-                    "filename": file + "_FAILED",
-                    "subfolder": "",
-                    "type": self.type
-                })
-
-        return { "ui": { "images": results } }
+                result.fail(error_msg)
+                return
+
+            logger.info(f'Image uploaded successfully to OneDrive.')
+            result.succeed(uploaded_file_info.get('id'), uploaded_file_info.get('webUrl'),
+                           uploaded_file_info.get('size') or os.path.getsize(result.local_path),
+                           local_file_uploaded=True)
+
+            for derivative in collect_derivatives(futures):
+                name = derivative.filename_for(result.filename)
+                preview_info = upload_bytes_to_onedrive(derivative.data, name, access_token, folder_id)
+                if preview_info:
+                    result.add_derivative(name, preview_info.get('id'), preview_info.get('webUrl'), len(derivative.data))
+
+        # Keep several upload sessions in flight when the batch contains large files
+        has_large = any(is_large_file(result.local_path) for result in results)
+        run_overlapped(upload_one, zip(results, derivative_futures), MAX_PARALLEL_SESSIONS if has_large else 1)
 
 
 NODE_CLASS_MAPPINGS = {
@@ -0,0 +1,219 @@
+import os
+import json
+import time
+import uuid
+import logging
+import itertools
+import threading
+from contextlib import contextmanager
+
+# --- Configuration ---
+CONFIG_FILE = os.path.join(os.path.dirname(__file__), "config.json")
+MANIFEST_FILE = os.path.join(os.path.dirname(__file__), "retention_manifest.json")
+
+DEFAULT_RETENTION_CONFIG = {
+    "enabled": False,
+    "max_age_hours": 24,       # 0 = no age limit
+    "max_total_mb": 2048,      # 0 = no size budget
+    "interval_seconds": 300,
+}
+
+# --- Logging Setup ---
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_sequence = itertools.count()
+_sequence_lock = threading.Lock()
+# Fixed per process, so workers sharing an upload folder (or a worker restarted
+# within the same second) never produce the same remote name
+_PROCESS_TOKEN = uuid.uuid4().hex[:6]
+
+
+def reserve_output_path(output_dir, prefix, batch_number, ext="png", suffix=""):
+    """
+    Creates an empty, never-before-used file in `output_dir` and returns (filename, path).
+    Names look like `prefix_00000_20240101-120000_3f9a1c-0007.png`: the per-process
+    token keeps names unique across workers and restarts, and O_EXCL guarantees no
+    two prompts in this directory ever get the same file.
+    """
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    while True:
+        with _sequence_lock:
+            seq = next(_sequence)
+        filename = f"{prefix}_{batch_number:05}_{stamp}_{_PROCESS_TOKEN}-{seq:04d}{suffix}.{ext}"
+        path = os.path.join(output_dir, filename)
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            continue
+        os.close(fd)
+        return filename, path
+
+
+@contextmanager
+def reserved_output_file(output_dir, prefix, batch_number, ext="png", suffix=""):
+    """
+    `reserve_output_path` for use around the save: yields (filename, path) and removes
+    the reserved file again if the body raises, so failed saves leave no empty files.
+    """
+    filename, path = reserve_output_path(output_dir, prefix, batch_number, ext, suffix)
+    try:
+        yield filename, path
+    except BaseException:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        raise
+
+
+def load_retention_config():
+    """Loads the 'retention' section of config.json on top of the defaults."""
+    config = dict(DEFAULT_RETENTION_CONFIG)
+    if os.path.exists(CONFIG_FILE):
+        try:
+            with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
+                config.update(json.load(f).get("retention", {}))
+        except Exception as e:
+            logger.error(f"❌ Failed to load retention config: {e}")
+    return config
+
+
+class RetentionManager:
+    """
+    Tracks local files whose upload was confirmed and evicts them in the background,
+    by age and by total size budget (oldest upload first). Files that were never
+    confirmed uploaded are never touched.
+    """
+    def __init__(self, config=None, manifest_file=MANIFEST_FILE):
+        self.config = config or load_retention_config()
+        self.manifest_file = manifest_file
+        self._entries = self._load_manifest()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def enabled(self):
+        return bool(self.config.get("enabled"))
+
+    def _load_manifest(self):
+        if os.path.exists(self.manifest_file):
+            try:
+                with open(self.manifest_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except Exception as e:
+                logger.error(f"❌ Failed to load retention manifest: {e}")
+        return {}
+
+    def _save_manifest(self):
+        try:
+            tmp_file = self.manifest_file + ".tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f)
+            os.replace(tmp_file, self.manifest_file)
+        except Exception as e:
+            logger.error(f"❌ Failed to save retention manifest: {e}")
+
+    def track(self, paths):
+        """Records local files as safely uploaded and therefore evictable."""
+        if not self.enabled:
+            return
+        now = time.time()
+        entries = {}
+        for path in paths:
+            try:
+                entries[os.path.abspath(path)] = {"size": os.path.getsize(path), "uploaded_at": now}
+            except OSError:
+                continue
+        if not entries:
+            return
+        with self._lock:
+            self._entries.update(entries)
+            self._save_manifest()
+        self.start()
+
+    def evict(self):
+        """Runs one eviction pass and returns the paths that were removed."""
+        max_age = float(self.config.get("max_age_hours") or 0) * 3600
+        budget = float(self.config.get("max_total_mb") or 0) * 1024 * 1024
+        now = time.time()
+        evicted = []
+
+        with self._lock:
+            # Forget files that were removed by someone else
+            for path in [p for p in self._entries if not os.path.exists(p)]:
+                del self._entries[path]
+
+            victims = set()
+            if max_age:
+                victims.update(p for p, e in self._entries.items() if now - e["uploaded_at"] > max_age)
+
+            if budget:
+                total = sum(e["size"] for p, e in self._entries.items() if p not in victims)
+                for path, entry in sorted(self._entries.items(), key=lambda item: item[1]["uploaded_at"]):
+                    if total <= budget:
+                        break
+                    if path not in victims:
+                        victims.add(path)
+                        total -= entry["size"]
+
+            for path in victims:
+                try:
+                    os.remove(path)
+                    evicted.append(path)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    logger.warning(f"⚠️ Could not evict {path}: {e}")
+                    continue
+                del self._entries[path]
+
+            if victims:
+                self._save_manifest()
+
+        if evicted:
+            logger.info(f"🧹 Evicted {len(evicted)} uploaded file(s) from the output directory.")
+        return evicted
+
+    def start(self):
+        """Starts the background eviction thread if it is not already running."""
+        if not self.enabled:
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="retention", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        interval = max(1.0, float(self.config.get("interval_seconds") or DEFAULT_RETENTION_CONFIG["interval_seconds"]))
+        while True:
+            try:
+                self.evict()
+            except Exception as e:
+                logger.error(f"❌ Retention pass failed: {e}")
+            time.sleep(interval)
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_retention_manager():
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = RetentionManager()
+            # Files recorded before a restart are evicted without waiting for a new upload
+            _manager.start()
+        return _manager
+
+
+def track_uploads(report):
+    """
+    Upload report callback: hands every local file whose own bytes were uploaded to
+    the retention manager. Files only sent as a downscaled preview (Telegram with
+    preview_size > 0) are the sole full-resolution copy and are kept.
+    """
+    get_retention_manager().track(
+        result.local_path for result in report.results
+        if result.ok and result.local_file_uploaded and result.local_path)
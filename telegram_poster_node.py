@@ -1,5 +1,6 @@
 import os
 import json
+import asyncio
 import logging
 from PIL import Image
 import numpy as np
@@ -11,6 +12,10 @@ from telegram import Bot
 # ComfyUI imports
 import folder_paths
 
+from .image_derivatives import TELEGRAM_PREVIEW_FORMAT, start_derivatives, collect_derivatives
+from .upload_results import UploadResult, submit_uploads, completed_report
+from .retention import reserved_output_file, track_uploads
+
 # --- Logging Setup ---
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -18,6 +23,7 @@ logger = logging.getLogger(__name__)
 # --- Config File Path ---
 # ⬇️ 统一使用 config.json
 CONFIG_FILE = os.path.join(os.path.dirname(__file__), "config.json")
+TELEGRAM_API_URL = "https://api.telegram.org/bot"
 
 # --- Load Config ---
 def load_telegram_config():
@@ -57,18 +63,24 @@ class TelegramImagePoster:
                 "filename_prefix": ("STRING", {"default": "TelegramPost"}),
                 "caption": ("STRING", {"default": "Generated by ComfyUI 🎨", "multiline": True}),
             },
+            "optional": {
+                # Telegram re-compresses photos to ~1280px anyway; 0 = send the full-size PNG
+                "preview_size": ("INT", {"default": 1280, "min": 0, "max": 10000, "step": 64}),
+                "wait_for_upload": ("BOOLEAN", {"default": True}),  # False → return immediately, post in background
+            },
             "hidden": {
                 "prompt": "PROMPT",
                 "extra_pnginfo": "EXTRA_PNGINFO"
             },
         }
 
-    RETURN_TYPES = ()
+    RETURN_TYPES = ("UPLOAD_RESULTS",)
+    RETURN_NAMES = ("upload_results",)
     FUNCTION = "post_and_preview"
     OUTPUT_NODE = True
     CATEGORY = "image/telegram"
 
-    async def post_and_preview(self, images, filename_prefix="TelegramPost", caption="Generated by ComfyUI 🎨", prompt=None, extra_pnginfo=None):
+    async def post_and_preview(self, images, filename_prefix="TelegramPost", caption="Generated by ComfyUI 🎨", preview_size=1280, wait_for_upload=True, prompt=None, extra_pnginfo=None):
         logger.info("📷 Starting Telegram image posting process...")
 
         bot_token, chat_id = load_telegram_config()
@@ -76,71 +88,100 @@ class TelegramImagePoster:
             logger.error("🛑 Telegram config invalid or missing. Skipping upload.")
             return self._return_preview(images, filename_prefix, prompt, extra_pnginfo)
 
-        bot = Bot(token=bot_token)
         results = []
+        derivative_futures = []
 
         for batch_number, image in enumerate(images):
             i = 255. * image.cpu().numpy()
             img = Image.fromarray(np.clip(i, 0, 255).astype(np.uint8))
-            file = f"{filename_prefix}_{batch_number:05}.png"
-            local_file_path = os.path.join(self.output_dir, file)
-
+            sizes = [preview_size] if preview_size > 0 else []
+            derivative_futures.append(start_derivatives(img, sizes, TELEGRAM_PREVIEW_FORMAT))
             # Save with metadata
-            try:
-                from PIL.PngImagePlugin import PngInfo
-                metadata = PngInfo()
-                if prompt:
-                    metadata.add_text("prompt", json.dumps(prompt))
-                if extra_pnginfo:
-                    for x in extra_pnginfo:
-                        metadata.add_text(x, json.dumps(extra_pnginfo[x]))
-                img.save(local_file_path, pnginfo=metadata, compress_level=self.compress_level)
-            except Exception as e:
-                logger.warning(f"⚠️ Could not save with metadata: {e}")
-                img.save(local_file_path, compress_level=self.compress_level)
-
-            # Post to Telegram
-            try:
-                with open(local_file_path, 'rb') as photo_file:
-                    await bot.send_photo(chat_id=chat_id, photo=photo_file, caption=caption)
-                logger.info(f"✅ Posted to Telegram: {file}")
-            except Exception as e:
-                logger.error(f"❌ Failed to post {file} to Telegram: {e}")
-
-            results.append({
-                "filename": file,
-                "subfolder": "",
-                "type": self.type
-            })
-
-        return {"ui": {"images": results}}
+            with reserved_output_file(self.output_dir, filename_prefix, batch_number) as (file, local_file_path):
+                try:
+                    from PIL.PngImagePlugin import PngInfo
+                    metadata = PngInfo()
+                    if prompt:
+                        metadata.add_text("prompt", json.dumps(prompt))
+                    if extra_pnginfo:
+                        for x in extra_pnginfo:
+                            metadata.add_text(x, json.dumps(extra_pnginfo[x]))
+                    img.save(local_file_path, pnginfo=metadata, compress_level=self.compress_level)
+                except Exception as e:
+                    logger.warning(f"⚠️ Could not save with metadata: {e}")
+                    img.save(local_file_path, compress_level=self.compress_level)
+
+            results.append(UploadResult("telegram", file, local_file_path))
+
+        # Posting runs on the shared upload pool with its own event loop,
+        # so the prompt can move on while photos are still being sent.
+        report = submit_uploads("telegram", results, self._post_batch, bot_token, chat_id, caption, derivative_futures)
+        report.add_done_callback(track_uploads)
+        if wait_for_upload:
+            await asyncio.wrap_future(report.future)
+
+        ui_images = [{
+            "filename": result.filename,
+            "subfolder": "",
+            "type": self.type
+        } for result in results]
+
+        return {"ui": {"images": ui_images}, "result": (report,)}
+
+    def _post_batch(self, results, bot_token, chat_id, caption, derivative_futures):
+        asyncio.run(self._send_photos(results, bot_token, chat_id, caption, derivative_futures))
+
+    async def _send_photos(self, results, bot_token, chat_id, caption, derivative_futures):
+        # `async with` closes the bot's HTTP client before asyncio.run() tears the loop down
+        async with Bot(token=bot_token, base_url=TELEGRAM_API_URL) as bot:
+            for result, futures in zip(results, derivative_futures):
+                result.start()
+                try:
+                    derivatives = collect_derivatives(futures)
+                    if derivatives:
+                        message = await bot.send_photo(chat_id=chat_id, photo=derivatives[0].data, caption=caption)
+                        size = len(derivatives[0].data)
+                        local_file_uploaded = False
+                    else:
+                        with open(result.local_path, 'rb') as photo_file:
+                            message = await bot.send_photo(chat_id=chat_id, photo=photo_file, caption=caption)
+                        size = os.path.getsize(result.local_path)
+                        local_file_uploaded = True
+                    logger.info(f"✅ Posted to Telegram: {result.filename}")
+                    result.succeed(message.message_id, getattr(message, "link", None), size,
+                                   local_file_uploaded=local_file_uploaded)
+                except Exception as e:
+                    logger.error(f"❌ Failed to post {result.filename} to Telegram: {e}")
+                    result.fail(e)
 
     def _return_preview(self, images, filename_prefix, prompt, extra_pnginfo):
         results = []
+        skipped = []
         for batch_number, image in enumerate(images):
             i = 255. * image.cpu().numpy()
             img = Image.fromarray(np.clip(i, 0, 255).astype(np.uint8))
-            file = f"{filename_prefix}_{batch_number:05}_local.png"
-            local_file_path = os.path.join(self.output_dir, file)
-
-            try:
-                from PIL.PngImagePlugin import PngInfo
-                metadata = PngInfo()
-                if prompt:
-                    metadata.add_text("prompt", json.dumps(prompt))
-                if extra_pnginfo:
-                    for x in extra_pnginfo:
-                        metadata.add_text(x, json.dumps(extra_pnginfo[x]))
-                img.save(local_file_path, pnginfo=metadata, compress_level=self.compress_level)
-            except:
-                img.save(local_file_path, compress_level=self.compress_level)
+            with reserved_output_file(self.output_dir, filename_prefix, batch_number, suffix="_local") as (file, local_file_path):
+                try:
+                    from PIL.PngImagePlugin import PngInfo
+                    metadata = PngInfo()
+                    if prompt:
+                        metadata.add_text("prompt", json.dumps(prompt))
+                    if extra_pnginfo:
+                        for x in extra_pnginfo:
+                            metadata.add_text(x, json.dumps(extra_pnginfo[x]))
+                    img.save(local_file_path, pnginfo=metadata, compress_level=self.compress_level)
+                except:
+                    img.save(local_file_path, compress_level=self.compress_level)
 
             results.append({
                 "filename": file,
                 "subfolder": "",
                 "type": self.type
             })
-        return {"ui": {"images": results}}  # UI 返回不需要 await
+            skipped_result = UploadResult("telegram", file, local_file_path)
+            skipped_result.skip("Telegram config invalid or missing")
+            skipped.append(skipped_result)
+        return {"ui": {"images": results}, "result": (completed_report("telegram", skipped),)}  # UI 返回不需要 await
 
 
 NODE_CLASS_MAPPINGS = {
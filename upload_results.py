@@ -0,0 +1,183 @@
+import json
+import logging
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# --- Configuration ---
+UPLOAD_WORKERS = 4
+
+# --- Logging Setup ---
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Shared by all uploader nodes so background uploads never block prompt execution
+_executor = ThreadPoolExecutor(max_workers=UPLOAD_WORKERS, thread_name_prefix="upload")
+
+
+class UploadResult:
+    """
+    Outcome of uploading one image: remote ID/link, bytes sent, timing and status.
+    Status is one of "pending", "uploaded", "failed" or "skipped".
+    """
+    def __init__(self, destination, filename, local_path=None):
+        self.destination = destination
+        self.filename = filename
+        self.local_path = local_path
+        self.status = "pending"
+        self.remote_id = None
+        self.url = None
+        self.bytes = 0
+        self.elapsed = None
+        self.error = None
+        self.derivatives = []
+        # True only when the bytes of `local_path` itself reached the remote,
+        # not just a downscaled preview of it
+        self.local_file_uploaded = False
+        self._started = None
+
+    def start(self):
+        self._started = time.monotonic()
+
+    def _stop(self):
+        if self._started is not None:
+            self.elapsed = round(time.monotonic() - self._started, 3)
+
+    def succeed(self, remote_id, url=None, size=0, local_file_uploaded=False):
+        self._stop()
+        self.status = "uploaded"
+        self.remote_id = remote_id
+        self.url = url
+        self.bytes = size or 0
+        self.local_file_uploaded = local_file_uploaded
+
+    def fail(self, error):
+        self._stop()
+        self.status = "failed"
+        self.error = str(error)
+
+    def skip(self, reason):
+        self.status = "skipped"
+        self.error = reason
+
+    def add_derivative(self, filename, remote_id, url=None, size=0):
+        self.derivatives.append({
+            "filename": filename,
+            "remote_id": remote_id,
+            "url": url,
+            "bytes": size or 0,
+        })
+
+    @property
+    def ok(self):
+        return self.status == "uploaded"
+
+    def to_dict(self):
+        return {
+            "destination": self.destination,
+            "filename": self.filename,
+            "status": self.status,
+            "remote_id": self.remote_id,
+            "url": self.url,
+            "bytes": self.bytes,
+            "elapsed": self.elapsed,
+            "error": self.error,
+            "local_file_uploaded": self.local_file_uploaded,
+            "derivatives": list(self.derivatives),
+        }
+
+
+class UploadReport:
+    """
+    What the uploader nodes output. Wraps a future that resolves to the list of
+    UploadResult objects once the background upload job has finished.
+    """
+    def __init__(self, destination, results, future):
+        self.destination = destination
+        self.results = results
+        self.future = future
+
+    def done(self):
+        return self.future.done()
+
+    def result(self, timeout=None):
+        """Blocks until the uploads finish and returns the UploadResult list."""
+        return self.future.result(timeout)
+
+    def add_done_callback(self, fn):
+        """Calls `fn(report)` once the uploads finish (immediately if they already have)."""
+        self.future.add_done_callback(lambda _future: fn(self))
+
+    def to_list(self, timeout=None):
+        return [result.to_dict() for result in self.result(timeout)]
+
+    def to_json(self, timeout=None):
+        return json.dumps(self.to_list(timeout), ensure_ascii=False, indent=2)
+
+    def __repr__(self):
+        state = "done" if self.done() else "pending"
+        return f"<UploadReport {self.destination}: {len(self.results)} image(s), {state}>"
+
+
+def submit_uploads(destination, results, job, *args):
+    """
+    Runs `job(results, *args)` on the shared upload pool and returns a report.
+    The job fills in each UploadResult; anything it leaves pending (e.g. because
+    it raised) is marked failed so the report always resolves.
+    """
+    def run():
+        try:
+            job(results, *args)
+        except Exception as e:
+            logger.error(f"❌ {destination} upload job crashed: {e}")
+            for result in results:
+                if result.status == "pending":
+                    result.fail(e)
+        return results
+
+    return UploadReport(destination, results, _executor.submit(run))
+
+
+def completed_report(destination, results=None):
+    """Returns an already resolved report, for runs that never reach the upload stage."""
+    results = results or []
+    future = Future()
+    future.set_result(results)
+    return UploadReport(destination, results, future)
+
+
+def pending_uploads():
+    """Number of upload jobs queued but not yet picked up by a worker."""
+    return _executor._work_queue.qsize()
+
+
+class UploadResultsToJSON:
+    """
+    Waits for an upload report and exposes it as a JSON string for downstream nodes.
+    """
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "upload_results": ("UPLOAD_RESULTS",),
+            },
+            "optional": {
+                "timeout": ("INT", {"default": 600, "min": 0, "max": 86400}),  # seconds, 0 = wait forever
+            },
+        }
+
+    RETURN_TYPES = ("STRING",)
+    RETURN_NAMES = ("json",)
+    FUNCTION = "to_json"
+    CATEGORY = "image/upload"
+
+    def to_json(self, upload_results, timeout=600):
+        return (upload_results.to_json(timeout or None),)
+
+
+NODE_CLASS_MAPPINGS = {
+    "UploadResultsToJSON": UploadResultsToJSON
+}
+
+NODE_DISPLAY_NAME_MAPPINGS = {
+    "UploadResultsToJSON": "📋 Upload Results to JSON"
+}